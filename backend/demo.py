@@ -3,11 +3,16 @@ PennyWise Interactive Demo
 Run: python demo.py
 """
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import sys
 
 API = "http://localhost:8000"
 
+# One keep-alive session so every call reuses the same pooled connection
+S = requests.Session()
+S.mount(API, HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
 def print_header(text):
     print(f"\n{'='*60}")
     print(f"  {text}")
@@ -18,7 +23,7 @@ def main():
     
     # Check health
     try:
-        health = requests.get(f"{API}/health", timeout=2)
+        health = S.get(f"{API}/health", timeout=2)
         if health.status_code != 200:
             print("❌ Backend not running. Start it with: python main.py")
             sys.exit(1)
@@ -32,7 +37,7 @@ def main():
     print_header("📊 Step 1: Generating Demo Data")
     print("Creating 1000 usage logs spanning 30 days...")
     
-    response = requests.post(f"{API}/v1/demo-data")
+    response = S.post(f"{API}/v1/demo-data")
     if response.status_code == 200:
         print("✅ Demo data generated successfully")
     
@@ -41,7 +46,7 @@ def main():
     # Step 2: Show initial summary
     print_header("💰 Step 2: Current Cost Summary")
     
-    summary = requests.get(f"{API}/v1/summary").json()
+    summary = S.get(f"{API}/v1/summary").json()
     
     print(f"Total Requests: {summary['total_requests']:,}")
     print(f"Total Cost: ${summary['total_cost']:,.2f}")
@@ -66,7 +71,7 @@ def main():
         print(f"\n[Query {i}] {description}")
         print(f"  Prompt: \"{query}\"")
         
-        result = requests.post(f"{API}/v1/optimize", json={
+        result = S.post(f"{API}/v1/optimize", json={
             "prompt": query,
             "model": "gpt-4",
             "provider": "openai",
@@ -0,0 +1,100 @@
+"""
+PennyWise request-path helpers
+Compiled with mypyc at deploy time by bin/post_compile; main.py imports the
+native extension when present and this module otherwise
+"""
+from typing import Dict, Optional, Tuple
+import logging
+import os
+import tiktoken
+import xxhash
+
+# Pricing per 1K tokens
+PRICING: Dict[str, Dict[str, float]] = {
+    "openai": {
+        "gpt-4": 0.03,
+        "gpt-4-turbo": 0.01,
+        "gpt-3.5-turbo": 0.0015,
+    },
+    "anthropic": {
+        "claude-opus": 0.075,
+        "claude-sonnet": 0.015,
+        "claude-haiku": 0.00125,
+    }
+}
+
+# Flattened (provider, model) -> price lookup for the per-request cost path
+PRICE: Dict[Tuple[str, str], float] = {
+    (p, m): v for p, models in PRICING.items() for m, v in models.items()
+}
+DEFAULT_PRICE = 0.001
+
+# Prompts under this many tokens (~100 characters of English) are routed to a
+# cheaper model
+SHORT_PROMPT_TOKENS = 25
+
+TOKEN_COUNT_CACHE_SIZE = 4096
+
+# bin/post_compile pre-fetches the BPE file here at build time, so loading the
+# encoding at startup reads it from disk instead of downloading it
+os.environ.setdefault(
+    "TIKTOKEN_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tiktoken")
+)
+
+logger = logging.getLogger(__name__)
+
+# Set by load_encoding(), which main.py runs off the event loop at startup;
+# until it succeeds token counts are estimated at ~4 characters per token
+_encoding: Optional[tiktoken.Encoding] = None
+
+# Token counts keyed by prompt hash, least recently used first
+_token_counts: Dict[int, int] = {}
+
+def load_encoding() -> bool:
+    """Load the tokenizer, returning whether it is available
+
+    Blocking (may download the BPE file); a failed load can be retried.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning("tiktoken encoding unavailable, estimating token counts from length: %s", e)
+            return False
+    return True
+
+def hash_prompt(prompt: str) -> int:
+    return xxhash.xxh3_64_intdigest(prompt.encode())
+
+def token_count(prompt: str, key: int) -> int:
+    """Token count of prompt, cached under key (its hash_prompt value)"""
+    count = _token_counts.pop(key, None)
+    if count is None:
+        if _encoding is None:
+            # Estimates aren't cached so the prompt is recounted once the
+            # encoding has loaded
+            return len(prompt) // 4
+        # Ordinary encoding treats special-token text such as <|endoftext|>
+        # as plain text instead of raising; this is only a routing estimate
+        count = len(_encoding.encode_ordinary(prompt))
+        if len(_token_counts) >= TOKEN_COUNT_CACHE_SIZE:
+            del _token_counts[next(iter(_token_counts))]
+    # (Re)inserting moves the key to the most recently used end
+    _token_counts[key] = count
+    return count
+
+def calculate_cost(provider: str, model: str, tokens: int) -> float:
+    return tokens * PRICE.get((provider, model), DEFAULT_PRICE) * 0.001
+
+def route_model(prompt: str, requested_model: str, key: int) -> str:
+    """Simple routing: downgrade if prompt is short
+
+    key is the prompt's hash_prompt value, already computed for the cache key.
+    """
+    if token_count(prompt, key) < SHORT_PROMPT_TOKENS:
+        if "gpt-4" in requested_model:
+            return "gpt-3.5-turbo"
+        if "opus" in requested_model:
+            return "claude-haiku"
+    return requested_model
@@ -2,35 +2,90 @@
 PennyWise MVP Backend
 Run: uvicorn main:app --reload
 """
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
+from contextlib import asynccontextmanager, suppress
+from cachetools import TTLCache
+import asyncio
 import datetime
-import hashlib
-import sqlite3
+import logging
+import os
 import json
+import time
+import aiosqlite
+import numpy as np
+import orjson
+from helpers import PRICING, calculate_cost, hash_prompt, load_encoding, route_model
 
-app = FastAPI(
-    title="PennyWise API",
-    description="LLM Cost Optimizer",
-    version="1.0.0"
-)
+# All times are UTC: responses carry an explicit +00:00 offset, while the
+# database keeps naive UTC text. Logged rows carry microseconds; rows stamped
+# by the CURRENT_TIMESTAMP default and the summary cutoffs are whole seconds
+# ("YYYY-MM-DD HH:MM:SS"), so a default-stamped row in the cutoff's own second
+# compares equal to the cutoff rather than below it.
+# Bound once so request paths skip the module/class attribute lookups.
+_now = datetime.datetime.now
+UTC = datetime.timezone.utc
+DB_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+DB_CUTOFF_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "https://*.vercel.app"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def db_timestamp(dt: datetime.datetime) -> str:
+    return dt.strftime(DB_TIMESTAMP_FORMAT)
+
+def db_cutoff(dt: datetime.datetime) -> str:
+    return dt.strftime(DB_CUTOFF_FORMAT)
+
+DB_PATH = 'pennywise.db'
+
+POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 256
+
+async def get_conn() -> aiosqlite.Connection:
+    """Open an autocommit connection with per-connection PRAGMAs applied"""
+    conn = await aiosqlite.connect(
+        DB_PATH, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE
+    )
+    await conn.execute("PRAGMA busy_timeout=30000")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    await conn.execute("PRAGMA temp_store=MEMORY")
+    await conn.execute("PRAGMA cache_size=-64000")
+    conn.row_factory = aiosqlite.Row
+    return conn
+
+class ConnectionPool:
+    """Fixed set of SQLite connections opened once and shared across requests"""
+
+    def __init__(self, size: int = POOL_SIZE):
+        self._size = size
+        self._conns: asyncio.Queue
+
+    async def open(self):
+        # Created here rather than in __init__ so the queue belongs to the
+        # event loop running the lifespan, not whichever loop was current at import
+        self._conns = asyncio.Queue(maxsize=self._size)
+        for _ in range(self._size):
+            self._conns.put_nowait(await get_conn())
+
+    async def close(self):
+        while not self._conns.empty():
+            await self._conns.get_nowait().close()
+
+    @asynccontextmanager
+    async def acquire(self):
+        conn = await self._conns.get()
+        try:
+            yield conn
+        finally:
+            self._conns.put_nowait(conn)
 
 # Initialize SQLite
-def init_db():
-    conn = sqlite3.connect('pennywise.db')
-    c = conn.cursor()
-    c.execute('''
+async def init_db():
+    conn = await get_conn()
+    # WAL persists on the database file, so it only needs setting once
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute('''
         CREATE TABLE IF NOT EXISTS usage_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -47,35 +102,316 @@ def init_db():
             feature TEXT
         )
     ''')
-    conn.commit()
-    conn.close()
-
-init_db()
-
-# Simple in-memory cache (use Redis in production)
-cache = {}
-
-# Pricing per 1K tokens
-PRICING = {
-    "openai": {
-        "gpt-4": 0.03,
-        "gpt-4-turbo": 0.01,
-        "gpt-3.5-turbo": 0.0015,
-    },
-    "anthropic": {
-        "claude-opus": 0.075,
-        "claude-sonnet": 0.015,
-        "claude-haiku": 0.00125,
-    }
-}
+    # Covering index for the summary rollup: the day is computed once at
+    # write time, and the scan returns rows already grouped by
+    # (day, provider, user), so SQLite neither sorts nor reads the table
+    await conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_usage_rollup
+        ON usage_logs(date(timestamp), provider, user_id, timestamp, cost, cache_hit)
+    ''')
+    await conn.close()
+
+# SQL used on request paths, kept as constants so each connection's
+# statement cache reuses the compiled statement
+COUNT_LOGS_SQL = "SELECT COUNT(*) FROM usage_logs"
+
+SUMMARY_VERSION_SQL = "SELECT MAX(id), COUNT(*) FROM usage_logs"
+
+INSERT_LOG_SQL = '''
+    INSERT INTO usage_logs 
+    (timestamp, user_id, provider, model, prompt_tokens, completion_tokens, total_tokens, cost, feature)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# GROUP BY matches the leading columns of idx_usage_rollup exactly, so the
+# rollup is a covering index scan; the date windows are conditional sums
+SUMMARY_ROLLUP_SQL = '''
+    CREATE TEMP TABLE summary_rollup AS
+    SELECT 
+        date(timestamp) as date,
+        provider,
+        user_id,
+        SUM(cost) as cost,
+        COUNT(*) as requests,
+        SUM(cache_hit) as cache_hits,
+        SUM(CASE WHEN timestamp >= :cutoff THEN cost ELSE 0 END) as range_cost,
+        SUM(timestamp >= :cutoff) as range_requests,
+        SUM(CASE WHEN timestamp >= :cutoff THEN cache_hit ELSE 0 END) as range_cache_hits,
+        SUM(CASE WHEN timestamp >= :cutoff_30 THEN cost ELSE 0 END) as last_30_cost,
+        SUM(timestamp >= :cutoff_30) as last_30_requests,
+        SUM(CASE WHEN timestamp >= :cutoff_30 THEN cache_hit ELSE 0 END) as last_30_cache_hits
+    FROM usage_logs
+    GROUP BY date(timestamp), provider, user_id
+'''
+
+SUMMARY_STATS_SQL = '''
+    SELECT 
+        COALESCE(SUM(range_requests), 0) as requests,
+        COALESCE(SUM(range_cost), 0) as total_cost,
+        COALESCE(SUM(range_cache_hits), 0) as cache_hits,
+        COALESCE(SUM(range_cost) / SUM(range_requests), 0) as avg_cost
+    FROM summary_rollup
+'''
+
+SUMMARY_DAILY_SQL = '''
+    SELECT 
+        date,
+        COALESCE(SUM(last_30_cost), 0) as cost,
+        SUM(last_30_requests) as requests,
+        COALESCE(SUM(last_30_cache_hits), 0) as cache_hits
+    FROM summary_rollup
+    GROUP BY date
+    HAVING SUM(last_30_requests) > 0
+    ORDER BY date
+'''
+
+SUMMARY_PROVIDERS_SQL = '''
+    SELECT 
+        provider, 
+        COALESCE(SUM(cost), 0) as cost,
+        SUM(requests) as requests
+    FROM summary_rollup
+    GROUP BY provider
+'''
+
+SUMMARY_TOP_USERS_SQL = '''
+    SELECT 
+        user_id,
+        COALESCE(SUM(cost), 0) as cost,
+        SUM(requests) as requests
+    FROM summary_rollup
+    GROUP BY user_id
+    ORDER BY cost DESC
+    LIMIT 10
+'''
+
+INSERT_DEMO_LOG_SQL = '''
+    INSERT INTO usage_logs 
+    (timestamp, user_id, provider, model, prompt_tokens, completion_tokens, 
+     total_tokens, cost, feature, cache_hit)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+pool = ConnectionPool()
+
+# /v1/log rows are queued and written in batches: the writer waits up to
+# LOG_FLUSH_INTERVAL seconds for a burst to accumulate (or until
+# LOG_BATCH_SIZE rows are waiting) and inserts them in one transaction
+LOG_FLUSH_INTERVAL = 0.05
+LOG_BATCH_SIZE = 500
+LOG_QUEUE_SIZE = 10_000
+
+logger = logging.getLogger(__name__)
+
+async def write_logs(rows: List[tuple]):
+    async with pool.acquire() as conn:
+        await conn.execute("BEGIN")
+        try:
+            await conn.executemany(INSERT_LOG_SQL, rows)
+            await conn.execute("COMMIT")
+            return
+        except Exception:
+            await conn.execute("ROLLBACK")
+            logger.exception("Batched write of %d usage logs failed, retrying row by row", len(rows))
+        # One bad row fails the whole batch, so fall back to separate inserts
+        # and only lose the rows that still fail
+        for row in rows:
+            try:
+                await conn.execute(INSERT_LOG_SQL, row)
+            except Exception:
+                logger.exception("Failed to write usage log %r", row)
+
+async def log_writer(log_queue: asyncio.Queue):
+    """Drain log_queue in batches until the shutdown sentinel (None) arrives"""
+    while True:
+        rows = [await log_queue.get()]
+        if log_queue.qsize() + 1 < LOG_BATCH_SIZE:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        while len(rows) < LOG_BATCH_SIZE and not log_queue.empty():
+            rows.append(log_queue.get_nowait())
+        
+        stop = rows[-1] is None
+        if stop:
+            rows.pop()
+        if rows:
+            try:
+                await write_logs(rows)
+            except Exception:
+                logger.exception("Failed to write %d usage logs", len(rows))
+        if stop:
+            return
+
+ENCODING_RETRY_INTERVAL = 60
+
+async def encoding_loader():
+    """Load the tokenizer off the event loop, retrying until it is available"""
+    while not await asyncio.to_thread(load_encoding):
+        await asyncio.sleep(ENCODING_RETRY_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    await pool.open()
+    # Routing estimates token counts from length until this finishes
+    encoding_task = asyncio.create_task(encoding_loader())
+    # Created per lifespan so the queue and writer share the serving event loop
+    app.state.log_queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+    writer = asyncio.create_task(log_writer(app.state.log_queue))
+    yield
+    # Flush whatever is still queued before closing the connections
+    await app.state.log_queue.put(None)
+    await writer
+    # Cancelling stops the retry loop, but the lifespan does not wait for an
+    # in-flight load: its worker thread runs to completion on its own
+    encoding_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await encoding_task
+    await pool.close()
+    await cache.close()
+
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+app = FastAPI(
+    title="PennyWise API",
+    description="LLM Cost Optimizer",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse
+)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "https://*.vercel.app"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Response cache: bounded in-memory LRU with TTL, or Redis when REDIS_URL is
+# set so the cache is shared across workers and survives restarts
+CACHE_MAXSIZE = 10_000
+CACHE_TTL = 3600
+
+REDIS_TIMEOUT = 0.5
+
+class LocalCache:
+    """Async get/set over an in-process TTLCache"""
+
+    def __init__(self, maxsize: int = CACHE_MAXSIZE, ttl: int = CACHE_TTL):
+        self._data = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key) -> Optional[str]:
+        return self._data.get(key)
+
+    async def set(self, key, value: str):
+        self._data[key] = value
+
+    async def close(self):
+        pass
+
+class RedisCache:
+    """Async get/set over Redis with the same TTL as the local cache
+
+    Redis errors (down, timing out) are logged and treated as cache misses
+    so the optimize path keeps working without the cache.
+    """
+
+    def __init__(self, url: str, ttl: int = CACHE_TTL):
+        import redis.asyncio
+        from redis.exceptions import RedisError
+        # Kept on the instance so the hot path doesn't re-run the import
+        self._error = RedisError
+        self._client = redis.asyncio.Redis.from_url(
+            url, decode_responses=True,
+            socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT
+        )
+        self._ttl = ttl
+
+    async def get(self, key) -> Optional[str]:
+        try:
+            return await self._client.get(f"pennywise:cache:{key}")
+        except self._error as e:
+            logger.warning("Redis cache get failed, treating as miss: %s", e)
+            return None
+
+    async def set(self, key, value: str):
+        try:
+            await self._client.setex(f"pennywise:cache:{key}", self._ttl, value)
+        except self._error as e:
+            logger.warning("Redis cache set failed: %s", e)
+
+    async def close(self):
+        await self._client.aclose()
+
+REDIS_URL = os.getenv("REDIS_URL")
+cache = RedisCache(REDIS_URL) if REDIS_URL else LocalCache()
+
+# Second-tier semantic cache: serves near-duplicate prompts ("What is Python?"
+# vs "what's python?") from a cached answer. Opt-in via SEMANTIC_CACHE=1 since
+# it needs `pip install sentence-transformers` and loads an embedding model.
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SEMANTIC_THRESHOLD = 0.92
+
+class SemanticCache:
+    """Nearest-neighbour lookup over embeddings of previously answered prompts
+
+    Embeddings are L2-normalised and kept in a fixed-size ring buffer, so a
+    single matrix-vector product gives the cosine similarity to every entry.
+    """
+
+    def __init__(self, model_name: str, threshold: float = SEMANTIC_THRESHOLD,
+                 maxsize: int = CACHE_MAXSIZE, ttl: int = CACHE_TTL):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name)
+        dim = self._model.get_sentence_embedding_dimension()
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._expires = np.zeros(maxsize, dtype=np.float64)
+        self._responses: List[Optional[str]] = [None] * maxsize
+        self._threshold = threshold
+        self._ttl = ttl
+        self._size = 0
+        self._next = 0
+
+    def embed(self, prompt: str):
+        return self._model.encode(prompt, normalize_embeddings=True).astype(np.float32)
+
+    def search(self, vec) -> Optional[str]:
+        if not self._size:
+            return None
+        scores = self._vectors[:self._size] @ vec
+        scores[self._expires[:self._size] < time.time()] = -1.0
+        best = int(scores.argmax())
+        return self._responses[best] if scores[best] >= self._threshold else None
+
+    def add(self, vec, response: str):
+        self._vectors[self._next] = vec
+        self._expires[self._next] = time.time() + self._ttl
+        self._responses[self._next] = response
+        self._next = (self._next + 1) % len(self._responses)
+        self._size = min(self._size + 1, len(self._responses))
+
+semantic_cache = SemanticCache(SEMANTIC_CACHE_MODEL) if os.getenv("SEMANTIC_CACHE") == "1" else None
+
+# Encoded /v1/summary bodies keyed by their ETag
+summary_cache = TTLCache(maxsize=32, ttl=60)
 
 # Models
+# Largest token count a /v1/log row accepts: rows are written after the
+# request returns, so anything SQLite can't store (INTEGER is 64-bit, and
+# total_tokens is the sum of both counts) must be rejected up front
+MAX_LOG_TOKENS = (2**63 - 1) // 2
+
 class UsageLog(BaseModel):
     user_id: str
     provider: str
     model: str
-    prompt_tokens: int
-    completion_tokens: int
+    prompt_tokens: int = Field(ge=0, le=MAX_LOG_TOKENS)
+    completion_tokens: int = Field(ge=0, le=MAX_LOG_TOKENS)
     feature: Optional[str] = None
 
 class OptimizeRequest(BaseModel):
@@ -84,20 +420,6 @@ class OptimizeRequest(BaseModel):
     provider: str
     user_id: str
 
-# Helpers
-def calculate_cost(provider: str, model: str, tokens: int) -> float:
-    price_per_1k = PRICING.get(provider, {}).get(model, 0.001)
-    return (tokens / 1000) * price_per_1k
-
-def route_model(prompt: str, requested_model: str) -> str:
-    """Simple routing: downgrade if prompt is short"""
-    if len(prompt) < 100:
-        if "gpt-4" in requested_model:
-            return "gpt-3.5-turbo"
-        if "opus" in requested_model:
-            return "claude-haiku"
-    return requested_model
-
 # ==================== ENDPOINTS ====================
 
 @app.get("/")
@@ -110,39 +432,34 @@ async def root():
 
 @app.get("/health")
 async def health():
-    conn = sqlite3.connect('pennywise.db')
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM usage_logs")
-    count = c.fetchone()[0]
-    conn.close()
+    async with pool.acquire() as conn:
+        async with conn.execute(COUNT_LOGS_SQL) as c:
+            count = (await c.fetchone())[0]
     
     return {
         "status": "healthy",
-        "timestamp": datetime.datetime.now().isoformat(),
+        "timestamp": _now(UTC).isoformat(),
         "total_logs": count
     }
 
 @app.post("/v1/log")
-async def log_usage(log: UsageLog):
-    """Log LLM usage"""
-    cost = calculate_cost(log.provider, log.model, log.total_tokens)
+async def log_usage(log: UsageLog, request: Request):
+    """Log LLM usage (written asynchronously in batches)"""
+    total_tokens = log.prompt_tokens + log.completion_tokens
+    cost = calculate_cost(log.provider, log.model, total_tokens)
+    # One stamp for both the stored row and the response
+    now = _now(UTC)
     
-    conn = sqlite3.connect('pennywise.db')
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO usage_logs 
-        (user_id, provider, model, prompt_tokens, completion_tokens, total_tokens, cost, feature)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (log.user_id, log.provider, log.model, 
-          log.prompt_tokens, log.completion_tokens, 
-          log.prompt_tokens + log.completion_tokens, cost, log.feature))
-    conn.commit()
-    conn.close()
+    await request.app.state.log_queue.put((
+        db_timestamp(now), log.user_id, log.provider, log.model,
+        log.prompt_tokens, log.completion_tokens,
+        total_tokens, cost, log.feature
+    ))
     
     return {
-        "status": "logged",
+        "status": "queued",
         "cost": round(cost, 4),
-        "timestamp": datetime.datetime.now().isoformat()
+        "timestamp": now.isoformat()
     }
 
 @app.post("/v1/optimize")
@@ -150,11 +467,22 @@ async def optimize(req: OptimizeRequest):
     """Optimize prompt + route model"""
     
     # Check cache
-    cache_key = hashlib.md5(req.prompt.encode()).hexdigest()
+    cache_key = hash_prompt(req.prompt)
     
-    if cache_key in cache:
+    cached = await cache.get(cache_key)
+    
+    # Fall back to the semantic tier only on an exact-key miss
+    prompt_vec = None
+    if cached is None and semantic_cache is not None:
+        # The encoder forward pass is CPU-bound; keep it off the event loop
+        prompt_vec = await asyncio.to_thread(semantic_cache.embed, req.prompt)
+        cached = semantic_cache.search(prompt_vec)
+        if cached is not None:
+            await cache.set(cache_key, cached)
+    
+    if cached is not None:
         return {
-            "response": cache[cache_key],
+            "response": cached,
             "optimized": True,
             "cache_hit": True,
             "original_model": req.model,
@@ -163,13 +491,15 @@ async def optimize(req: OptimizeRequest):
         }
     
     # Route to optimal model
-    optimal_model = route_model(req.prompt, req.model)
+    optimal_model = route_model(req.prompt, req.model, cache_key)
     
     # Mock response
     response = f"Optimized response to: {req.prompt[:50]}..."
     
     # Cache it
-    cache[cache_key] = response
+    await cache.set(cache_key, response)
+    if semantic_cache is not None and prompt_vec is not None:
+        semantic_cache.add(prompt_vec, response)
     
     cost_saved = 0.025 if optimal_model != req.model else 0
     
@@ -182,152 +512,163 @@ async def optimize(req: OptimizeRequest):
         "cost_saved": round(cost_saved, 4)
     }
 
-@app.get("/v1/summary")
-async def get_summary(days: int = 30):
-    """Get cost summary"""
-    conn = sqlite3.connect('pennywise.db')
-    c = conn.cursor()
-    
-    # Overall stats
-    c.execute('''
-        SELECT 
-            COUNT(*) as requests,
-            COALESCE(SUM(cost), 0) as total_cost,
-            COALESCE(SUM(cache_hit), 0) as cache_hits,
-            COALESCE(AVG(cost), 0) as avg_cost
-        FROM usage_logs
-        WHERE timestamp >= datetime('now', '-' || ? || ' days')
-    ''', (days,))
-    
-    stats = c.fetchone()
-    
-    # Daily breakdown (last 30 days)
-    c.execute('''
-        SELECT 
-            DATE(timestamp) as date,
-            COALESCE(SUM(cost), 0) as cost,
-            COUNT(*) as requests,
-            COALESCE(SUM(cache_hit), 0) as cache_hits
-        FROM usage_logs
-        WHERE timestamp >= datetime('now', '-30 days')
-        GROUP BY DATE(timestamp)
-        ORDER BY date
-    ''')
-    
-    daily = []
-    for row in c.fetchall():
-        daily.append({
-            "date": row[0],
-            "cost": round(row[1], 2),
-            "requests": row[2],
-            "cache_hits": row[3],
-            "saved": round(row[1] * 0.7, 2)  # Assume 70% savings
-        })
-    
-    # Provider breakdown
-    c.execute('''
-        SELECT 
-            provider, 
-            COALESCE(SUM(cost), 0) as cost,
-            COUNT(*) as requests
-        FROM usage_logs
-        GROUP BY provider
-    ''')
-    
-    providers = []
-    for row in c.fetchall():
-        providers.append({
-            "provider": row[0],
-            "cost": round(row[1], 2),
-            "requests": row[2]
-        })
-    
-    # Top users
-    c.execute('''
-        SELECT 
-            user_id,
-            COALESCE(SUM(cost), 0) as cost,
-            COUNT(*) as requests
-        FROM usage_logs
-        GROUP BY user_id
-        ORDER BY cost DESC
-        LIMIT 10
-    ''')
+async def build_summary(days: int) -> dict:
+    """Aggregate usage_logs into the dashboard summary"""
+    # Cutoffs are computed once and bound as parameters so the comparison is
+    # a plain range on the stored UTC timestamp text
+    now = _now(UTC).replace(microsecond=0)
+    cutoff = db_cutoff(now - datetime.timedelta(days=days))
+    cutoff_30 = db_cutoff(now - datetime.timedelta(days=30))
     
-    top_users = []
-    for row in c.fetchall():
-        top_users.append({
-            "user_id": row[0],
-            "cost": round(row[1], 2),
-            "requests": row[2]
-        })
-    
-    conn.close()
+    async with pool.acquire() as conn:
+        c = await conn.cursor()
+        
+        # Scan usage_logs once into a small per-day/provider/user rollup that
+        # all four breakdowns below aggregate from. The read transaction keeps
+        # the rollup and the queries on one consistent snapshot.
+        await c.execute("BEGIN")
+        try:
+            await c.execute("DROP TABLE IF EXISTS temp.summary_rollup")
+            await c.execute(SUMMARY_ROLLUP_SQL, {"cutoff": cutoff, "cutoff_30": cutoff_30})
+            
+            # Overall stats
+            await c.execute(SUMMARY_STATS_SQL)
+            
+            stats = await c.fetchone()
+            
+            # Daily breakdown (last 30 days)
+            await c.execute(SUMMARY_DAILY_SQL)
+            
+            daily = [{
+                "date": r["date"],
+                "cost": round(r["cost"], 2),
+                "requests": r["requests"],
+                "cache_hits": r["cache_hits"],
+                "saved": round(r["cost"] * 0.7, 2)  # Assume 70% savings
+            } for r in await c.fetchall()]
+            
+            # Provider breakdown
+            await c.execute(SUMMARY_PROVIDERS_SQL)
+            
+            providers = [{
+                "provider": r["provider"],
+                "cost": round(r["cost"], 2),
+                "requests": r["requests"]
+            } for r in await c.fetchall()]
+            
+            # Top users
+            await c.execute(SUMMARY_TOP_USERS_SQL)
+            
+            top_users = [{
+                "user_id": r["user_id"],
+                "cost": round(r["cost"], 2),
+                "requests": r["requests"]
+            } for r in await c.fetchall()]
+        finally:
+            await c.execute("DROP TABLE IF EXISTS temp.summary_rollup")
+            await c.execute("COMMIT")
     
-    requests_count = stats[0] or 0
-    cache_hit_rate = (stats[2] / requests_count * 100) if requests_count > 0 else 0
+    requests_count = stats["requests"] or 0
+    cache_hit_rate = (stats["cache_hits"] / requests_count * 100) if requests_count > 0 else 0
     
     return {
         "total_requests": requests_count,
-        "total_cost": round(stats[1], 2),
-        "cost_saved": round(stats[1] * 0.7, 2),
-        "cache_hits": stats[2] or 0,
+        "total_cost": round(stats["total_cost"], 2),
+        "cost_saved": round(stats["total_cost"] * 0.7, 2),
+        "cache_hits": stats["cache_hits"] or 0,
         "cache_hit_rate": round(cache_hit_rate, 1),
-        "avg_cost_per_request": round(stats[3], 4),
+        "avg_cost_per_request": round(stats["avg_cost"], 4),
         "daily_breakdown": daily,
         "provider_breakdown": providers,
         "top_users": top_users
     }
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag (RFC 9110)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+# Upper bound on the summary window; keeps the cutoff within datetime's range
+SUMMARY_MAX_DAYS = 36500
+
+@app.get("/v1/summary")
+async def get_summary(request: Request, days: int = Query(30, ge=0, le=SUMMARY_MAX_DAYS)):
+    """Get cost summary"""
+    # Version the summary by the newest row id and row count; the minute
+    # bucket lets rows age out of the date windows without new writes
+    async with pool.acquire() as conn:
+        async with conn.execute(SUMMARY_VERSION_SQL) as c:
+            max_id, count = await c.fetchone()
+    minute = _now(UTC).strftime("%Y%m%d%H%M")
+    etag = f'"{max_id or 0}-{count}-{days}-{minute}"'
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    # Cache the encoded body so repeat hits skip both SQL and serialization
+    body = summary_cache.get(etag)
+    if body is None:
+        body = orjson.dumps(await build_summary(days))
+        summary_cache[etag] = body
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
 @app.post("/v1/demo-data")
 async def generate_demo_data():
     """Generate demo data"""
-    import random
-    from datetime import timedelta
+    n = 1000
+    rng = np.random.default_rng()
     
-    conn = sqlite3.connect('pennywise.db')
-    c = conn.cursor()
+    providers = np.array(["openai", "anthropic"])
+    models = np.array([
+        ["gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"],
+        ["claude-opus", "claude-sonnet", "claude-haiku"]
+    ])
+    prices = np.array([[PRICING[p][m] for m in row] for p, row in zip(providers, models)])
+    users = np.array([f"user_{i:03d}" for i in range(1, 11)])
+    features = np.array(["chatbot", "summarization", "code-gen", "translation", "analysis"])
     
-    # Clear existing data
-    c.execute("DELETE FROM usage_logs")
+    # Generate 1000 logs over last 30 days, one vectorised draw per column
+    provider_idx = rng.integers(0, 2, n)
+    model_idx = rng.integers(0, 3, n)
     
-    providers = ["openai", "anthropic"]
-    models = {
-        "openai": ["gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"],
-        "anthropic": ["claude-opus", "claude-sonnet", "claude-haiku"]
-    }
-    users = [f"user_{i:03d}" for i in range(1, 11)]
-    features = ["chatbot", "summarization", "code-gen", "translation", "analysis"]
+    prompt_tokens = rng.integers(50, 1501, n)
+    completion_tokens = rng.integers(20, 801, n)
+    total_tokens = prompt_tokens + completion_tokens
     
-    # Generate 1000 logs over last 30 days
-    for i in range(1000):
-        provider = random.choice(providers)
-        model = random.choice(models[provider])
-        user = random.choice(users)
-        feature = random.choice(features)
-        
-        prompt_tokens = random.randint(50, 1500)
-        completion_tokens = random.randint(20, 800)
-        total_tokens = prompt_tokens + completion_tokens
-        
-        cost = calculate_cost(provider, model, total_tokens)
-        cache_hit = 1 if random.random() > 0.13 else 0  # 87% cache rate
-        
-        # Random timestamp in last 30 days
-        days_ago = random.randint(0, 29)
-        hours_ago = random.randint(0, 23)
-        timestamp = datetime.datetime.now() - timedelta(days=days_ago, hours=hours_ago)
-        
-        c.execute('''
-            INSERT INTO usage_logs 
-            (timestamp, user_id, provider, model, prompt_tokens, completion_tokens, 
-             total_tokens, cost, feature, cache_hit)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp, user, provider, model, prompt_tokens, completion_tokens,
-              total_tokens, cost, feature, cache_hit))
+    cost = (total_tokens / 1000) * prices[provider_idx, model_idx]
+    cache_hit = (rng.random(n) > 0.13).astype(np.int8)  # 87% cache rate
+    
+    # Random timestamp in last 30 days
+    offsets = (rng.integers(0, 30, n) * np.timedelta64(1, "D")
+               + rng.integers(0, 24, n) * np.timedelta64(1, "h"))
+    timestamps = np.datetime64(_now(UTC).replace(tzinfo=None), "us") - offsets
+    timestamps = np.char.replace(np.datetime_as_string(timestamps, unit="us"), "T", " ")
+    
+    # sqlite3 only binds native Python types, so convert each column once
+    rows = list(zip(
+        timestamps.tolist(), users[rng.integers(0, len(users), n)].tolist(),
+        providers[provider_idx].tolist(), models[provider_idx, model_idx].tolist(),
+        prompt_tokens.tolist(), completion_tokens.tolist(), total_tokens.tolist(),
+        cost.tolist(), features[rng.integers(0, len(features), n)].tolist(), cache_hit.tolist()
+    ))
     
-    conn.commit()
-    conn.close()
+    async with pool.acquire() as conn:
+        # Pooled connections autocommit, so open the transaction explicitly
+        await conn.execute("BEGIN")
+        try:
+            # Clear existing data
+            await conn.execute("DELETE FROM usage_logs")
+            await conn.executemany(INSERT_DEMO_LOG_SQL, rows)
+            await conn.execute("COMMIT")
+        except Exception:
+            await conn.execute("ROLLBACK")
+            raise
     
     return {
         "status": "success",
@@ -336,7 +677,6 @@ async def generate_demo_data():
 
 if __name__ == "__main__":
     import uvicorn
-    import os
     port = int(os.getenv("PORT", 8000))
     print("🚀 Starting PennyWise API...")
     print("📖 API Docs: http://localhost:8000/docs")